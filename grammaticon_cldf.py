@@ -0,0 +1,87 @@
+import io
+import json
+import zipfile
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from grammaticon_common import read_csv
+
+# Reading CLDF archives
+
+PROP_STRUCTURE_DATASET = 'http://cldf.clld.org/v1.0/terms.rdf#StructureDataset'
+
+PROP_PARAMETER_TABLE = 'http://cldf.clld.org/v1.0/terms.rdf#ParameterTable'
+PROP_VALUE_TABLE = 'http://cldf.clld.org/v1.0/terms.rdf#ValueTable'
+
+PROP_ID = 'http://cldf.clld.org/v1.0/terms.rdf#id'
+PROP_NAME = 'http://cldf.clld.org/v1.0/terms.rdf#name'
+PROP_DESCRIPTION = 'http://cldf.clld.org/v1.0/terms.rdf#description'
+PROP_PARAMETER_ID = 'http://cldf.clld.org/v1.0/terms.rdf#parameterReference'
+PROP_LANGUAGE_ID = 'http://cldf.clld.org/v1.0/terms.rdf#languageReference'
+
+
+def get_collection_parameters_from_zip(path):
+    parameters = {}
+    with ExitStack() as stack:
+        zf = stack.enter_context(zipfile.ZipFile(path))
+        json_files = [
+            info for info in zf.infolist() if info.filename.endswith('.json')]
+        json_metadata = [
+            (info, md)
+            for info in json_files
+            if (md := json.load(stack.enter_context(zf.open(info))))
+            and isinstance(md, dict)
+            and md.get('dc:conformsTo') == PROP_STRUCTURE_DATASET]
+        for info, md in json_metadata:
+            parameter_table_name = None
+            parameter_id_col = None
+            parameter_name_col = None
+            parameter_desc_col = None
+            value_table_name = None
+            value_parameter_col = None
+            value_language_col = None
+            for table in md['tables']:
+                if table.get('dc:conformsTo') == PROP_PARAMETER_TABLE:
+                    parameter_table_name = table.get('url')
+                    for colspec in table['tableSchema']['columns']:
+                        if colspec.get('propertyUrl') == PROP_ID:
+                            parameter_id_col = colspec['name']
+                        elif colspec.get('propertyUrl') == PROP_NAME:
+                            parameter_name_col = colspec['name']
+                        elif colspec.get('propertyUrl') == PROP_DESCRIPTION:
+                            parameter_desc_col = colspec['name']
+                elif table.get('dc:conformsTo') == PROP_VALUE_TABLE:
+                    value_table_name = table.get('url')
+                    for colspec in table['tableSchema']['columns']:
+                        if colspec.get('propertyUrl') == PROP_PARAMETER_ID:
+                            value_parameter_col = colspec['name']
+                        elif colspec.get('propertyUrl') == PROP_LANGUAGE_ID:
+                            value_language_col = colspec['name']
+            if parameter_table_name is None:
+                continue
+
+            cldf_path = Path(info.filename).parent
+
+            languages_per_parameter_id = defaultdict(set)
+            if value_table_name:
+                vf = stack.enter_context(zf.open(str(cldf_path / value_table_name)))
+                vf_unicode = io.TextIOWrapper(vf, encoding='utf-8')
+                for row in read_csv(vf_unicode):
+                    parameter_id = row.get(value_parameter_col)
+                    language_id = row.get(value_language_col)
+                    if parameter_id and language_id:
+                        languages_per_parameter_id[parameter_id].add(language_id)
+            language_counts = {id_: len(lgs) for id_, lgs in languages_per_parameter_id.items()}
+
+            pf = stack.enter_context(zf.open(str(cldf_path / parameter_table_name)))
+            pf_unicode = io.TextIOWrapper(pf, encoding='utf-8')
+            parameters.update(
+                (parameter_id,
+                 {'ID': parameter_id,
+                  'Name': row.get(parameter_name_col) or '',
+                  'Description': row.get(parameter_desc_col) or '',
+                  'Language_Count': language_counts.get(parameter_id) or 0})
+                for row in read_csv(pf_unicode)
+                if (parameter_id := row.get(parameter_id_col)))
+    return parameters
@@ -0,0 +1,39 @@
+import csv
+import re
+from pathlib import Path
+
+
+def find_repository_root():
+    # after a regular (non-editable) install this module lives in
+    # site-packages, so fall back to the current working directory
+    for candidate in (Path(__file__).parent, Path.cwd()):
+        if candidate.joinpath('raw').is_dir():
+            return candidate
+    return None
+
+
+HERE = find_repository_root() or Path.cwd()
+RAW_DIR = HERE / 'raw'
+CSV_DIR = RAW_DIR / 'csv-export'
+DOWNLOAD_DIR = RAW_DIR / 'download'
+DEST_DIR = HERE / 'csvw'
+
+# Reading raw data
+
+def read_csv(f):
+    rdr = csv.reader(f)
+    header = next(rdr)
+    for row in rdr:
+        yield {k: v.strip() for k, v in zip(header, row) if v.strip()}
+
+
+def get_zenodo_no(doi):
+    if (m := re.fullmatch(r'10\.5281/zenodo\.(\d+)', doi)):
+        return int(m.group(1))
+    else:
+        msg = 'doi looks funky: {}'.format(doi)
+        raise AssertionError(msg)
+
+
+def get_zip_path(record_no):
+    return DOWNLOAD_DIR / f'{record_no}.zip'
@@ -0,0 +1,215 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from grammaticon_cldf import get_collection_parameters_from_zip
+from grammaticon_common import (
+    DEST_DIR, DOWNLOAD_DIR, HERE, RAW_DIR, get_zenodo_no, get_zip_path, read_csv)
+from grammaticon_csvw import load_csvw_tables
+from grammaticon_download import download_file
+
+# Tracking feature coverage across releases
+
+# derived data -- raw/ holds curated input and make-csvw empties csvw/
+COVERAGE_HISTORY_PATH = HERE / 'coverage' / 'feature-coverage-history.csv'
+DOWNLOAD_WORKERS = 4
+ZENODO_PAGE_SIZE = 100
+# bump this whenever get_collection_parameters_from_zip changes what it
+# extracts, so cached summaries from older versions get recomputed
+ARCHIVE_SUMMARY_FORMAT = 1
+
+
+def get_zenodo_json(url):
+    assert url.startswith('https://')
+    req = Request(url, headers={'Content-Type': 'application/json'})
+    with urlopen(req) as resp:
+        return json.load(resp)
+
+
+def get_record_versions(record_no):
+    url = (
+        f'https://zenodo.org/api/records/{quote(str(record_no))}/versions'
+        f'?allversions=true&size={ZENODO_PAGE_SIZE}')
+    records = []
+    while url:
+        page = get_zenodo_json(url)
+        records.extend(page['hits']['hits'])
+        url = (page.get('links') or {}).get('next')
+    return records
+
+
+def get_release(collection_id, zenodo_record):
+    record_no = zenodo_record['id']
+    zip_files = [
+        file
+        for file in zenodo_record.get('files') or ()
+        if file['key'].endswith('.zip')]
+    if len(zip_files) != 1:
+        print(f'zenodo record {record_no}: expected exactly one zip file', file=sys.stderr)
+        return None
+    metadata = zenodo_record.get('metadata') or {}
+    return {
+        'Collection_ID': collection_id,
+        'Zenodo_Record': record_no,
+        'Release': metadata.get('version') or '',
+        'Release_Date': metadata.get('publication_date') or '',
+        'Zip_URL': zip_files[0]['links']['self'],
+        'Zip_Path': get_zip_path(record_no),
+    }
+
+
+def get_summary_path(zip_path):
+    return zip_path.with_suffix('.parameters.json')
+
+
+def load_archive_summary(zip_path):
+    summary_path = get_summary_path(zip_path)
+    # zenodo records are immutable, so the summary only goes stale if the
+    # archive itself was replaced
+    if (not summary_path.exists()
+            or summary_path.stat().st_mtime_ns < zip_path.stat().st_mtime_ns):
+        return None
+    try:
+        with open(summary_path, encoding='utf-8') as f:
+            summary = json.load(f)
+    except ValueError:
+        return None
+    if isinstance(summary, dict) and summary.get('Format') == ARCHIVE_SUMMARY_FORMAT:
+        return summary['Language_Counts']
+    else:
+        return None
+
+
+def summarise_archive(zip_path):
+    language_counts = {
+        parameter_id: parameter['Language_Count']
+        for parameter_id, parameter in get_collection_parameters_from_zip(zip_path).items()}
+    summary_path = get_summary_path(zip_path)
+    tmp_path = summary_path.with_name(f'{summary_path.name}.part')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'Format': ARCHIVE_SUMMARY_FORMAT, 'Language_Counts': language_counts},
+            f)
+    tmp_path.replace(summary_path)
+    return language_counts
+
+
+def download_release(release):
+    print(f'downloading {release["Zip_Path"]}...', file=sys.stderr)
+    download_file(release['Zip_URL'], release['Zip_Path'])
+
+
+def run_parallel(pool, function, items, failures, describe):
+    # like pool.map, but one failing item does not lose the whole run
+    futures = {pool.submit(function, item): item for item in items}
+    results = []
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            results.append((item, future.result()))
+        except Exception as e:
+            message = f'{describe(item)}: {e!r}'
+            print(message, file=sys.stderr)
+            failures.append(message)
+    return results
+
+
+def coverage_history(progname, args):
+    parser = argparse.ArgumentParser(
+        prog=f'{progname} coverage-history',
+        description='track language counts of features across all releases of the collections')
+    parser.add_argument(
+        '-o', '--output', type=Path, default=COVERAGE_HISTORY_PATH,
+        help='output file (default: %(default)s)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help='number of archives to process in parallel (default: %(default)s)')
+    opts = parser.parse_args(args)
+
+    if not DEST_DIR.joinpath('csvw-metadata.json').exists():
+        print(f'no csvw dataset found in {DEST_DIR}', file=sys.stderr)
+        print('run `python3', progname, 'make-csvw` to create it', file=sys.stderr)
+        sys.exit(66)
+    _, tables, _ = load_csvw_tables(lambda name: DEST_DIR.joinpath(name).read_bytes())
+    collection_ids_by_name = {row['Name']: row['ID'] for row in tables['collections.csv']}
+    with open(RAW_DIR / 'dois.csv', encoding='utf-8') as f:
+        zenodo_ids = {
+            collection_ids_by_name[row['Name']]: get_zenodo_no(row['DOI'])
+            for row in read_csv(f)}
+
+    # resolve all versions of each record
+
+    failures = []
+    with ThreadPoolExecutor(DOWNLOAD_WORKERS) as pool:
+        versions = dict(run_parallel(
+            pool, get_record_versions, zenodo_ids.values(), failures,
+            lambda record_no: f'zenodo record {record_no}: cannot resolve versions'))
+    releases = [
+        release
+        for collection_id, record_no in zenodo_ids.items()
+        for zenodo_record in versions.get(record_no) or ()
+        if (release := get_release(collection_id, zenodo_record))]
+
+    # fetch missing archives
+
+    DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    missing_releases = [r for r in releases if not r['Zip_Path'].exists()]
+    with ThreadPoolExecutor(DOWNLOAD_WORKERS) as pool:
+        run_parallel(
+            pool, download_release, missing_releases, failures,
+            lambda release: f'{release["Zip_URL"]}: download failed')
+    releases = [r for r in releases if r['Zip_Path'].exists()]
+
+    # extract parameter summaries, reusing the ones from earlier runs
+
+    language_counts = {
+        path: summary
+        for release in releases
+        if (summary := load_archive_summary(path := release['Zip_Path'])) is not None}
+    unsummarised = sorted({
+        release['Zip_Path']
+        for release in releases
+        if release['Zip_Path'] not in language_counts})
+    if unsummarised:
+        print(f'summarising {len(unsummarised)} archives...', file=sys.stderr)
+        with ProcessPoolExecutor(max(1, opts.jobs)) as pool:
+            language_counts.update(run_parallel(
+                pool, summarise_archive, unsummarised, failures,
+                lambda path: f'{path}: cannot read archive'))
+    releases = [r for r in releases if r['Zip_Path'] in language_counts]
+
+    # write the history
+
+    releases_per_collection = {}
+    for release in sorted(
+            releases, key=lambda r: (r['Release_Date'], r['Zenodo_Record'])):
+        releases_per_collection.setdefault(release['Collection_ID'], []).append(release)
+
+    history = [
+        (feature['ID'], release['Zenodo_Record'], release['Release'],
+         release['Release_Date'], counts[id_in_collection])
+        for feature in tables['features.csv']
+        if (id_in_collection := feature.get('ID_in_Collection'))
+        for release in releases_per_collection.get(feature.get('Collection_ID')) or ()
+        if id_in_collection in (counts := language_counts[release['Zip_Path']])]
+    opts.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(opts.output, 'w', encoding='utf-8', newline='') as f:
+        wtr = csv.writer(f)
+        wtr.writerow([
+            'Feature_ID', 'Zenodo_Record', 'Release', 'Release_Date',
+            'Language_Count'])
+        wtr.writerows(history)
+    print(
+        f'{opts.output}: {len(history)} rows'
+        f' for {len({row[0] for row in history})} features'
+        f' in {len(releases)} releases',
+        file=sys.stderr)
+    if failures:
+        print(f'skipped {len(failures)} records or releases:', file=sys.stderr)
+        print('\n'.join(f' * {message}' for message in failures), file=sys.stderr)
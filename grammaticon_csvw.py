@@ -0,0 +1,42 @@
+import hashlib
+import io
+import json
+
+from grammaticon_common import read_csv
+
+# Reading CSVW builds
+
+def parse_csvw_cell(value, colspec):
+    if (sep := colspec.get('separator')):
+        return [v.strip() for v in value.split(sep) if v.strip()]
+    elif colspec.get('datatype') == 'integer':
+        return int(value)
+    else:
+        return value
+
+
+def load_csvw_tables(read_build_file):
+    metadata_bytes = read_build_file('csvw-metadata.json')
+    metadata = json.loads(metadata_bytes)
+    # hash the data as well -- rebuilding from a dirty work tree does not
+    # change the git description
+    digest = hashlib.sha1(metadata_bytes)
+    tables = {}
+    for table in metadata['tables']:
+        columns = {col['name']: col for col in table['tableSchema']['columns']}
+        data = read_build_file(table['url'])
+        digest.update(data)
+        try:
+            tables[table['url']] = [
+                {k: parse_csvw_cell(v, columns.get(k) or {}) for k, v in row.items()}
+                for row in read_csv(io.StringIO(data.decode('utf-8'), newline=''))]
+        except ValueError as e:
+            raise ValueError(f"{table['url']}: {e}") from e
+    return metadata, tables, digest.hexdigest()
+
+
+def get_git_description(metadata):
+    for entity in metadata.get('prov:wasDerivedFrom') or ():
+        if (description := entity.get('dc:created')):
+            return description
+    return 'unknown'
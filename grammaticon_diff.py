@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+from itertools import chain
+from pathlib import Path
+
+from grammaticon_common import DEST_DIR, HERE
+from grammaticon_csvw import get_git_description, load_csvw_tables
+
+# Comparing dataset builds
+
+class DuplicateKeyError(ValueError):
+    pass
+
+
+def get_build_reader(build):
+    if (path := Path(build)).is_dir():
+        return lambda name: path.joinpath(name).read_bytes()
+    git_exe = shutil.which('git')
+    assert git_exe is not None
+
+    def read_build_file(name):
+        procresult = subprocess.run(
+            [git_exe, '-C', str(HERE), 'show', f'{build}:{DEST_DIR.name}/{name}'],
+            stdout=subprocess.PIPE, check=True)
+        return procresult.stdout
+
+    return read_build_file
+
+
+def get_key_columns(table):
+    schema = table['tableSchema']
+    if (primary_key := schema.get('primaryKey')):
+        return [primary_key] if isinstance(primary_key, str) else primary_key
+    colnames = [col['name'] for col in schema['columns']]
+    if 'ID' in colnames:
+        return ['ID']
+    # link tables are keyed on the ids they link
+    foreign_key_cols = [
+        colname
+        for fk in schema.get('foreignKeys') or ()
+        for colname in fk['columnReference']]
+    return foreign_key_cols or colnames
+
+
+def hash_row(row):
+    return hashlib.sha1(
+        json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8')).digest()
+
+
+def index_rows(rows, key_columns):
+    index = {}
+    for row in rows:
+        key = tuple(row.get(col, '') for col in key_columns)
+        if key in index:
+            raise DuplicateKeyError(
+                f'duplicate key: {format_row_key(key, key_columns)}')
+        index[key] = hash_row(row), row
+    return index
+
+
+def format_row_key(key, key_columns):
+    if len(key_columns) == 1:
+        return key[0]
+    else:
+        return dict(zip(key_columns, key))
+
+
+def index_build_table(build, tables, table_name, key_columns):
+    try:
+        return index_rows(tables.get(table_name) or (), key_columns)
+    except DuplicateKeyError as e:
+        raise DuplicateKeyError(f'{build}: {table_name}: {e}') from None
+
+
+def diff_tables(old_index, new_index, key_columns):
+    added = [
+        format_row_key(key, key_columns)
+        for key in new_index if key not in old_index]
+    removed = [
+        format_row_key(key, key_columns)
+        for key in old_index if key not in new_index]
+    changed = []
+    for key, (new_hash, new_row) in new_index.items():
+        if key not in old_index or old_index[key][0] == new_hash:
+            continue
+        old_row = old_index[key][1]
+        columns = list(old_row) + [col for col in new_row if col not in old_row]
+        changed.append({
+            'key': format_row_key(key, key_columns),
+            'changes': {
+                col: [old_row.get(col), new_row.get(col)]
+                for col in columns
+                if old_row.get(col) != new_row.get(col)}})
+    return {
+        name: entries
+        for name, entries in (
+            ('added', added), ('removed', removed), ('changed', changed))
+        if entries}
+
+
+def load_build(build):
+    try:
+        metadata, tables, _ = load_csvw_tables(get_build_reader(build))
+    except ValueError as e:
+        raise ValueError(f'{build}: {e}') from e
+    return metadata, tables
+
+
+def diff_builds(old_build, new_build):
+    old_metadata, old_tables = load_build(old_build)
+    new_metadata, new_tables = load_build(new_build)
+    table_specs = {
+        table['url']: table
+        for table in chain(old_metadata['tables'], new_metadata['tables'])}
+    changelog = {
+        'old': {'build': str(old_build), 'version': get_git_description(old_metadata)},
+        'new': {'build': str(new_build), 'version': get_git_description(new_metadata)},
+        'tables': {},
+    }
+    for table_name, table in table_specs.items():
+        key_columns = get_key_columns(table)
+        table_diff = diff_tables(
+            index_build_table(old_build, old_tables, table_name, key_columns),
+            index_build_table(new_build, new_tables, table_name, key_columns),
+            key_columns)
+        if table_diff:
+            changelog['tables'][table_name] = table_diff
+    return changelog
+
+
+def diff(progname, args):
+    parser = argparse.ArgumentParser(
+        prog=f'{progname} diff',
+        description='compare two builds of the CSVW dataset')
+    parser.add_argument(
+        'old', help='csvw folder or git revision of the old build')
+    parser.add_argument(
+        'new', nargs='?', default=str(DEST_DIR),
+        help='csvw folder or git revision of the new build (default: %(default)s)')
+    parser.add_argument(
+        '-o', '--output', type=Path,
+        help='write the changelog to this file instead of stdout')
+    opts = parser.parse_args(args)
+    try:
+        changelog = diff_builds(opts.old, opts.new)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f'cannot read build: {e}', file=sys.stderr)
+        sys.exit(66)
+    except ValueError as e:
+        print(f'invalid build: {e}', file=sys.stderr)
+        sys.exit(65)
+
+    for table_name, table_diff in changelog['tables'].items():
+        summary = ', '.join(
+            f'{len(entries)} {name}' for name, entries in table_diff.items())
+        print(f'{table_name}: {summary}', file=sys.stderr)
+    if not changelog['tables']:
+        print('No changes.', file=sys.stderr)
+
+    output = json.dumps(changelog, ensure_ascii=False)
+    if opts.output:
+        with open(opts.output, 'w', encoding='utf-8') as f:
+            print(output, file=f)
+    else:
+        print(output)
@@ -0,0 +1,58 @@
+import sys
+
+from grammaticon_common import DOWNLOAD_DIR, RAW_DIR, get_zenodo_no, get_zip_path, read_csv
+
+# Downloading the collections
+
+def download_file(url, out_path):
+    from urllib.request import urlopen
+
+    assert url.startswith('https://')
+    # download to a temporary file first, so an interrupted download does not
+    # leave a broken archive behind
+    tmp_path = out_path.with_name(f'{out_path.name}.part')
+    with urlopen(url) as resp, open(tmp_path, 'wb') as f:
+        while (chunk := resp.read(65536)):
+            f.write(chunk)
+    tmp_path.replace(out_path)
+
+
+def download_collections(progname, args):
+    with open(RAW_DIR / 'dois.csv', encoding='utf-8') as f:
+        collections = list(read_csv(f))
+    for coll in collections:
+        coll['ID'] = get_zenodo_no(coll['DOI'])
+        coll['Zip_Path'] = get_zip_path(coll['ID'])
+    collections = {coll['ID']: coll for coll in collections}
+
+    missing_records = [
+        record_no
+        for record_no, coll in collections.items()
+        if not coll['Zip_Path'].exists()]
+    if not missing_records:
+        print('Nothing to do.', file=sys.stderr)
+        return
+
+    # urllib.request pulls in http.client, email, and ssl, so only import it
+    # once there is actually something to download
+    import json
+    from urllib.parse import quote
+    from urllib.request import Request, urlopen
+
+    query = 'OR'.join(
+        '(id:{})'.format(record_no) for record_no in missing_records)
+    zenodo_url = f'https://zenodo.org/api/records?q={quote(query)}'
+    assert zenodo_url.startswith('https://')
+    req = Request(zenodo_url, headers={'Content-Type': 'application/json'})
+    with urlopen(req) as resp:
+        record_metadata = json.load(resp)
+    # TODO: worry about pagination later
+    assert len(record_metadata['hits']['hits']) == len(missing_records), "it's time to worry about pagination"
+
+    DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    for zenodo_record in record_metadata['hits']['hits']:
+        record_no = zenodo_record['id']
+        assert len(zenodo_record['files']) == 1, record_no
+        out_path = collections[record_no]['Zip_Path']
+        print(f'downloading {out_path}...', file=sys.stderr)
+        download_file(zenodo_record['files'][0]['links']['self'], out_path)
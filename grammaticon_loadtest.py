@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import quote
+
+from grammaticon_serve import SERVE_HOST, SERVE_PORT
+
+# Load-testing the server
+
+async def http_get(reader, writer, host, path, extra_headers=None):
+    request = [f'GET {quote(path)} HTTP/1.1', f'Host: {host}']
+    request.extend(f'{k}: {v}' for k, v in (extra_headers or {}).items())
+    writer.write(('\r\n'.join(request) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in {b'\r\n', b'\n', b''}:
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if status == 304:
+        # a 304 has no body, even though it carries the 200 Content-Length
+        body = b''
+    else:
+        body = await reader.readexactly(int(headers.get('content-length') or 0))
+    return status, headers, body
+
+
+async def load_test_worker(host, port, paths, etag, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            extra_headers = {'If-None-Match': etag} if etag else None
+            start = time.perf_counter()
+            status, _, _ = await http_get(reader, writer, host, path, extra_headers)
+            latencies.append(time.perf_counter() - start)
+            assert status in {200, 304, 404}, f'{path}: HTTP {status}'
+    finally:
+        writer.close()
+
+
+def get_load_test_paths(concept_ids, feature_ids, collection_ids, count):
+    templates = [
+        ('/concepts/{}', concept_ids),
+        ('/concepts/{}/parents', concept_ids),
+        ('/concepts/{}/children', concept_ids),
+        ('/concepts/{}/ancestors', concept_ids),
+        ('/concepts/{}/features', concept_ids),
+        ('/features/{}', feature_ids),
+        ('/features/{}/concepts', feature_ids),
+        ('/collections/{}/features', collection_ids),
+    ]
+    templates = [(t, ids) for t, ids in templates if ids]
+    return [
+        template.format(ids[(n * 7919) % len(ids)])
+        for n in range(count)
+        for template, ids in [templates[n % len(templates)]]]
+
+
+async def run_load_test(host, port, request_count, concurrency, revalidate):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        ids = {}
+        for name in ('concepts', 'features', 'collections'):
+            _, headers, body = await http_get(reader, writer, host, f'/{name}')
+            ids[name] = [row['ID'] for row in json.loads(body)]
+        etag = headers.get('etag') if revalidate else None
+    finally:
+        writer.close()
+
+    paths = get_load_test_paths(
+        ids['concepts'], ids['features'], ids['collections'], request_count)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        load_test_worker(host, port, paths[n::concurrency], etag, latencies)
+        for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f'requests:    {len(latencies)}')
+    print(f'concurrency: {concurrency}')
+    print(f'elapsed:     {elapsed:.2f} s')
+    print(f'throughput:  {len(latencies) / elapsed:.0f} req/s')
+    print(f'p50 latency: {percentile(0.50):.2f} ms')
+    print(f'p99 latency: {percentile(0.99):.2f} ms')
+
+
+def load_test(progname, args):
+    parser = argparse.ArgumentParser(
+        prog=f'{progname} load-test',
+        description='measure throughput and latency of a running `serve`')
+    parser.add_argument('--host', default=SERVE_HOST)
+    parser.add_argument('--port', type=int, default=SERVE_PORT)
+    parser.add_argument('-n', '--requests', type=int, default=10000)
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument(
+        '--revalidate', action='store_true',
+        help='send If-None-Match with the current ETag')
+    opts = parser.parse_args(args)
+    try:
+        asyncio.run(run_load_test(
+            opts.host, opts.port, opts.requests, max(1, opts.concurrency),
+            opts.revalidate))
+    except ConnectionError as e:
+        print(f'cannot reach http://{opts.host}:{opts.port}/: {e}', file=sys.stderr)
+        sys.exit(69)
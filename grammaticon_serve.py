@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections import OrderedDict, defaultdict, deque
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import unquote
+
+from grammaticon_common import DEST_DIR
+from grammaticon_csvw import get_git_description, load_csvw_tables
+
+# Serving the dataset
+
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8000
+RESPONSE_CACHE_SIZE = 1024
+RELOAD_INTERVAL = 2.0
+MAX_REQUEST_BODY_SIZE = 4096
+
+
+def transitive_closure(start, edges):
+    seen = {start}
+    closure = []
+    todo = deque(edges.get(start) or ())
+    while todo:
+        node = todo.popleft()
+        if node not in seen:
+            seen.add(node)
+            closure.append(node)
+            todo.extend(edges.get(node) or ())
+    return closure
+
+
+def make_dataset_index(csvw_dir):
+    metadata, tables, digest = load_csvw_tables(
+        lambda name: csvw_dir.joinpath(name).read_bytes())
+
+    parents = defaultdict(list)
+    children = defaultdict(list)
+    for row in tables['concept-hierarchy.csv']:
+        parents[row['Child_ID']].append(row['Parent_ID'])
+        children[row['Parent_ID']].append(row['Child_ID'])
+
+    features_by_concept = defaultdict(list)
+    concepts_by_feature = defaultdict(list)
+    for row in tables['concepts-features.csv']:
+        features_by_concept[row['Concept_ID']].append(row)
+        concepts_by_feature[row['Feature_ID']].append(row)
+
+    features_by_collection = defaultdict(list)
+    for row in tables['features.csv']:
+        if (collection_id := row.get('Collection_ID')):
+            features_by_collection[collection_id].append(row['ID'])
+
+    concepts = {row['ID']: row for row in tables['concepts.csv']}
+    return {
+        'etag': '"{}-{}"'.format(get_git_description(metadata), digest[:12]),
+        'concepts': concepts,
+        'features': {row['ID']: row for row in tables['features.csv']},
+        'collections': {row['ID']: row for row in tables['collections.csv']},
+        'parents': parents,
+        'children': children,
+        'ancestors': {
+            concept_id: transitive_closure(concept_id, parents)
+            for concept_id in concepts},
+        'descendants': {
+            concept_id: transitive_closure(concept_id, children)
+            for concept_id in concepts},
+        'features_by_concept': features_by_concept,
+        'concepts_by_feature': concepts_by_feature,
+        'features_by_collection': features_by_collection,
+        'response_cache': OrderedDict(),
+    }
+
+
+def get_csvw_stamp(csvw_dir):
+    return tuple(sorted(
+        (p.name, (st := p.stat()).st_mtime_ns, st.st_size)
+        for p in csvw_dir.iterdir()))
+
+
+def render_concept_links(index, concept_id, rel):
+    if rel in {'parents', 'children', 'ancestors', 'descendants'}:
+        return [index['concepts'][id_] for id_ in index[rel].get(concept_id) or ()]
+    elif rel == 'features':
+        return [
+            dict(index['features'][link['Feature_ID']], Link_Comment=link.get('Comment', ''))
+            for link in index['features_by_concept'].get(concept_id) or ()]
+    else:
+        return None
+
+
+def render_feature_links(index, feature_id, rel):
+    if rel == 'concepts':
+        return [
+            dict(index['concepts'][link['Concept_ID']], Link_Comment=link.get('Comment', ''))
+            for link in index['concepts_by_feature'].get(feature_id) or ()]
+    else:
+        return None
+
+
+def render_collection_links(index, collection_id, rel):
+    if rel == 'features':
+        return [
+            index['features'][id_]
+            for id_ in index['features_by_collection'].get(collection_id) or ()]
+    else:
+        return None
+
+
+LINK_RENDERERS = {
+    'concepts': render_concept_links,
+    'features': render_feature_links,
+    'collections': render_collection_links,
+}
+
+
+def render_path(index, path):
+    parts = [p for p in path.split('/') if p]
+    if not parts:
+        return 200, {
+            'version': index['etag'].strip('"'),
+            'endpoints': [
+                '/concepts', '/concepts/{id}',
+                '/concepts/{id}/parents', '/concepts/{id}/children',
+                '/concepts/{id}/ancestors', '/concepts/{id}/descendants',
+                '/concepts/{id}/features',
+                '/features', '/features/{id}', '/features/{id}/concepts',
+                '/collections', '/collections/{id}',
+                '/collections/{id}/features']}
+    elif parts[0] not in LINK_RENDERERS or len(parts) > 3:
+        return 404, {'error': f'not found: {path}'}
+    elif len(parts) == 1:
+        return 200, list(index[parts[0]].values())
+    elif (row := index[parts[0]].get(parts[1])) is None:
+        return 404, {'error': f'unknown {parts[0][:-1]}: {parts[1]}'}
+    elif len(parts) == 2:
+        return 200, row
+    elif (links := LINK_RENDERERS[parts[0]](index, parts[1], parts[2])) is None:
+        return 404, {'error': f'not found: {path}'}
+    else:
+        return 200, links
+
+
+def get_response(index, path):
+    cache = index['response_cache']
+    if (response := cache.get(path)) is not None:
+        cache.move_to_end(path)
+        return response
+    status, data = render_path(index, path)
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    response = status, body
+    cache[path] = response
+    if len(cache) > RESPONSE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return response
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match uses weak comparison (RFC 9110, section 13.1.2)
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def format_http_response(status, headers, body):
+    head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+    head.extend(f'{k}: {v}' for k, v in headers.items())
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def handle_http_connection(state, reader, writer):
+    try:
+        while (request_line := await reader.readline()):
+            headers = {}
+            while (line := await reader.readline()) not in {b'\r\n', b'\n', b''}:
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            method, path, version = (request_line.decode('latin-1').split() + ['', '', ''])[:3]
+            path = unquote(path.partition('?')[0])
+            keep_alive = (
+                headers.get('connection', '').lower() != 'close'
+                if version == 'HTTP/1.1'
+                else headers.get('connection', '').lower() == 'keep-alive')
+
+            # the api never looks at request bodies, but they must not be
+            # mistaken for the next request on the connection
+            body_too_large = False
+            if 'transfer-encoding' in headers:
+                keep_alive = False
+            elif (content_length := headers.get('content-length')):
+                if not content_length.isdigit():
+                    keep_alive = False
+                elif int(content_length) > MAX_REQUEST_BODY_SIZE:
+                    body_too_large = True
+                    keep_alive = False
+                else:
+                    await reader.readexactly(int(content_length))
+
+            index = state['index']
+            response_headers = {
+                'Content-Type': 'application/json; charset=utf-8',
+                'ETag': index['etag']}
+            if body_too_large:
+                status, body = 413, b'{"error": "request body too large"}'
+            elif method not in {'GET', 'HEAD'}:
+                status, body = 405, b'{"error": "method not allowed"}'
+                response_headers['Allow'] = 'GET, HEAD'
+                keep_alive = False
+            else:
+                status, body = get_response(index, path)
+                if (status == 200
+                        and (if_none_match := headers.get('if-none-match'))
+                        and etag_matches(if_none_match, index['etag'])):
+                    # keep the body for now, so Content-Length still matches
+                    # the 200 response like it does for HEAD
+                    status = 304
+            response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+            response_headers['Content-Length'] = str(len(body))
+            if method == 'HEAD' or status == 304:
+                body = b''
+            writer.write(format_http_response(status, response_headers, body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except ValueError:
+        # request line or header longer than the stream limit
+        pass
+    finally:
+        writer.close()
+
+
+async def watch_csvw_dir(state, csvw_dir):
+    loop = asyncio.get_running_loop()
+    previous_stamp = state['stamp']
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        try:
+            stamp = get_csvw_stamp(csvw_dir)
+        except FileNotFoundError:
+            continue
+        # only reload once `make-csvw` is done writing, i.e. the folder has
+        # not changed since the last poll
+        if stamp == state['stamp'] or stamp != previous_stamp:
+            previous_stamp = stamp
+            continue
+        # don't retry a broken build until the folder changes again
+        if stamp == state.get('failed_stamp'):
+            continue
+        try:
+            index = await loop.run_in_executor(None, make_dataset_index, csvw_dir)
+        except Exception as e:
+            print(f'reloading {csvw_dir} failed: {e!r}', file=sys.stderr)
+            state['failed_stamp'] = stamp
+            continue
+        state['index'] = index
+        state['stamp'] = stamp
+        print(f'reloaded {csvw_dir} (version {index["etag"]})', file=sys.stderr)
+
+
+async def run_server(host, port, csvw_dir):
+    state = {
+        'stamp': get_csvw_stamp(csvw_dir),
+        'index': make_dataset_index(csvw_dir)}
+    server = await asyncio.start_server(
+        lambda r, w: handle_http_connection(state, r, w), host, port)
+    print(f'serving {csvw_dir} on http://{host}:{port}/', file=sys.stderr)
+    watcher = asyncio.create_task(watch_csvw_dir(state, csvw_dir))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def serve(progname, args):
+    parser = argparse.ArgumentParser(
+        prog=f'{progname} serve',
+        description='serve the CSVW dataset as a read-only JSON API')
+    parser.add_argument('--host', default=SERVE_HOST)
+    parser.add_argument('--port', type=int, default=SERVE_PORT)
+    parser.add_argument('--csvw-dir', type=Path, default=DEST_DIR)
+    opts = parser.parse_args(args)
+    if not opts.csvw_dir.joinpath('csvw-metadata.json').exists():
+        print(f'no csvw dataset found in {opts.csvw_dir}', file=sys.stderr)
+        print('run `python3', progname, 'make-csvw` to create it', file=sys.stderr)
+        sys.exit(66)
+    try:
+        asyncio.run(run_server(opts.host, opts.port, opts.csvw_dir))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,59 @@
+import csv
+import sys
+from itertools import chain, repeat
+
+from grammaticon_common import CSV_DIR, RAW_DIR
+
+# dependencies for xlsx-to-csv
+try:
+    XLSX_TO_CSV_DEPS = ['openpyxl']
+    from openpyxl import load_workbook
+    xlsx_to_csv_deps_okay = True
+except ModuleNotFoundError:
+    xlsx_to_csv_deps_okay = False
+
+
+# Conversion from Excel to CSV
+
+def normalise_excel_cell(value):
+    if value is None:
+        return ''
+    else:
+        return str(value).strip()
+
+
+def pad_list(ls, width):
+    if len(ls) == width:
+        return ls
+    elif len(ls) < width:
+        return list(chain(ls, repeat('', width - len(ls))))
+    else:
+        raise ValueError(f'too long: {ls}')
+
+
+def xlsx_file_to_csv_file(excel_path, outdir):
+    wb = load_workbook(filename=str(excel_path), read_only=True, data_only=True)
+    worksheets = wb.worksheets
+    assert len(worksheets) == 1, f'{excel_path}: not exactly 1 worksheet'
+    sheet = worksheets[0]
+    rows = [
+        row_norm
+        for row in sheet.iter_rows()
+        if any(row_norm := [normalise_excel_cell(cell.value) for cell in row])]
+
+    dest = outdir.joinpath(excel_path.name).with_suffix('.csv')
+    table_width = max(len(row) for row in rows)
+    if not outdir.is_dir():
+        outdir.mkdir()
+    with open(dest, 'w', encoding='utf-8') as f:
+        wtr = csv.writer(f)
+        wtr.writerows(pad_list(row, table_width) for row in rows)
+
+
+def xlsx_to_csv(progname, args):
+    if not xlsx_to_csv_deps_okay:
+        print('the make-csvw command requires following python packages:', file=sys.stderr)
+        print('\n'.join(f'\t{dep}' for dep in XLSX_TO_CSV_DEPS), file=sys.stderr)
+        sys.exit(72)
+    for p in RAW_DIR.glob('*.xlsx'):
+        xlsx_file_to_csv_file(p, CSV_DIR)
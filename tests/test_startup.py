@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+
+HEAVY_MODULES = {'csvw', 'openpyxl', 'simplepybtex', 'asyncio', 'urllib.request'}
+
+# generous, so slow CI runners don't fail the test -- a regression to
+# eagerly importing the per-command dependencies still shows up
+STARTUP_TIME_LIMIT = 0.5
+
+HELP_ARGS = ['grammaticon.py', '--help']
+DOWNLOAD_ARGS = ['-c', 'import grammaticon_download']
+
+
+def get_imported_modules(args):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=REPO_DIR, capture_output=True, encoding='utf-8')
+    return proc.returncode, {
+        line.rpartition('|')[2].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith('import time:')}
+
+
+def get_startup_time(args, runs=3):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=REPO_DIR, capture_output=True, check=False)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_help_imports_no_command_dependencies():
+    returncode, modules = get_imported_modules(HELP_ARGS)
+    assert returncode == 64
+    assert not modules & HEAVY_MODULES
+
+
+def test_download_imports_no_network_or_archive_modules():
+    returncode, modules = get_imported_modules(DOWNLOAD_ARGS)
+    assert returncode == 0
+    assert not modules & (HEAVY_MODULES | {'zipfile'})
+
+
+@pytest.mark.parametrize('args', [HELP_ARGS, DOWNLOAD_ARGS], ids=['help', 'download'])
+def test_startup_time(args):
+    assert get_startup_time(args) < STARTUP_TIME_LIMIT